@@ -8,12 +8,14 @@ TURN_TICK_S      = 0.5   # left/right step duration (seconds)
 FORWARD_SPD      = 0.7
 TURN_SPD         = 0.45
 BACK_SPD         = 0.6
+IDLE_SAMPLE_S    = 5.0   # REMOTE idle: seconds between sensor sweeps (state is only re-sent if it changed)
 
 # --------- Distance Heuristics ----------
 STOP_CM          = 15.0  # too close -> evasive turn
 CLEAR_CM         = 30.0  # comfortable clear
 MAX_DISTANCE_M   = 3.0
 SAMPLES_PER_READ = 3
+PARALLEL_SONAR   = False  # ping all sensors at once; only if they can't hear each other's echoes
 
 # --- Stuck detection ---
 STUCK_DELTA_CM   = 5.0   # consider "no change" if spread < this
@@ -37,4 +39,9 @@ RIGHT_ECHO = 21
 
 # --------- Web ----------
 DASHBOARD_PORT = 8000
+COMMANDS_Q_MAXSIZE = 64  # pending web commands before new ones are rejected
+
+# --------- Run log ----------
+LOG_FLUSH_ROWS = 16  # flush the CSV after this many rows...
+LOG_FLUSH_S = 1.0    # ...or once this many seconds have passed since the last flush
 
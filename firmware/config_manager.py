@@ -10,8 +10,14 @@ class ConfigManager:
         self._persist_path = persist_path
         self._overrides: Dict[str, Any] = {}
         self._writer = None  # Will be set by the controller
+        self._version = 0  # Bumped whenever the overrides change
         self._load()
-        
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter that changes whenever the overrides change"""
+        return self._version
+
     def set_writer(self, writer):
         """Set the writer function for logging configuration changes"""
         self._writer = writer
@@ -57,6 +63,7 @@ class ConfigManager:
                     self._overrides[k] = v
         
         if changes:  # Only save if there were actual changes
+            self._version += 1
             self._save()
             
             # Log the changes in a format that fits the CSV notes column
@@ -85,6 +92,7 @@ class ConfigManager:
         if was_cleared:  # Only log if there were overrides to clear
             notes = f"CONFIG: Cleared overrides: {', '.join(self._overrides.keys())}"
             self._overrides = {}
+            self._version += 1
             self._save()
             
             if hasattr(self, '_writer') and callable(self._writer):
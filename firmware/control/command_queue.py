@@ -0,0 +1,84 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+
+class CommandQueue:
+    """
+    Bounded command queue built on a deque and an Event.
+
+    Producers (HTTP handlers) and the single consumer (the
+    controller loop) hand commands over through ``deque.append`` /
+    ``deque.popleft``, which are atomic in CPython, so the hot path takes no
+    lock. The Event only wakes a consumer blocked in ``get``.
+
+    The ``put_nowait`` / ``get_nowait`` / ``get`` / ``qsize`` methods mirror
+    ``queue.Queue`` (raising ``queue.Full`` / ``queue.Empty``) so existing
+    callers keep working. The size bound is best-effort: concurrent producers
+    may overshoot it by one item each.
+
+    Messages are dicts tagged with a ``"type"`` key so the consumer can
+    dispatch on it directly; bare command names (the legacy format)
+    are wrapped as ``{"type": "legacy", "name": ...}`` on enqueue.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._items: deque = deque()
+        self._ready = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def append(self, item: Any) -> None:
+        """Enqueue without the size check (internal producers)."""
+        if type(item) is str:
+            item = {"type": "legacy", "name": item}
+        self._items.append(item)
+        self._ready.set()
+
+    def popleft(self) -> Any:
+        """Dequeue without blocking; raises IndexError when empty."""
+        return self._items.popleft()
+
+    def put_nowait(self, item: Any) -> None:
+        if self.maxsize > 0 and len(self._items) >= self.maxsize:
+            raise queue.Full
+        self.append(item)
+
+    def get_nowait(self) -> Any:
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise queue.Empty from None
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """Dequeue, waiting up to ``timeout`` seconds for an item when ``block`` is set."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._items.popleft()
+            except IndexError:
+                pass
+            if not block:
+                raise queue.Empty
+            self._ready.clear()
+            # Re-check after clearing so an append between popleft and clear isn't missed
+            try:
+                return self._items.popleft()
+            except IndexError:
+                pass
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            if not self._ready.wait(remaining):
+                raise queue.Empty
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
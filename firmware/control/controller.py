@@ -1,37 +1,106 @@
 from __future__ import annotations
 import time
-import json
-import datetime
+import queue
+import logging
+import threading
+import concurrent.futures
+from collections import deque
+from math import inf, isinf
 
 try:
     from firmware import config
     from firmware.config_manager import ConfigManager
     from firmware.policy_manager import PolicyManager
+    from firmware.control.motion import Motion, MOTION_NAMES, parse_motion, is_motion_name
+    from firmware.control.command_queue import CommandQueue
+    from firmware.web.sse import encode_json
 except Exception:
     import config  # type: ignore
     from config_manager import ConfigManager  # type: ignore
     from policy_manager import PolicyManager  # type: ignore
+    from control.motion import Motion, MOTION_NAMES, parse_motion, is_motion_name  # type: ignore
+    from control.command_queue import CommandQueue  # type: ignore
+    from web.sse import encode_json  # type: ignore
 
+log = logging.getLogger(__name__)
 
-def execute_motion(robot, motion: str, speed: float, duration: float):
-    if motion == "forward":
-        robot.forward(speed)
-    elif motion == "backward":
-        robot.backward(speed)
-    elif motion == "left":
-        robot.left(speed)
-    elif motion == "right":
-        robot.right(speed)
-    else:
+# Robot drive method per Motion value; STOP has none and just stops the robot
+_DRIVE_METHODS = (None, "forward", "backward", "left", "right")
+
+
+def drive_table(robot):
+    """Bound drive methods of ``robot`` indexed by Motion value (None for STOP)."""
+    return tuple(None if name is None else getattr(robot, name) for name in _DRIVE_METHODS)
+
+
+def _pack_distances(front_d: float, left_d: float, right_d: float):
+    """Round raw readings for publishing; no-echo (inf) becomes None."""
+    return (
+        None if isinf(front_d) else round(front_d, 2),
+        None if isinf(left_d) else round(left_d, 2),
+        None if isinf(right_d) else round(right_d, 2),
+    )
+
+
+def execute_motion(robot, motion: Motion, speed: float, duration: float, drive=None, wait=time.sleep):
+    """Drive ``motion`` at ``speed`` for ``duration`` seconds, then stop.
+
+    ``drive`` is a cached ``drive_table(robot)``; it is built on the fly when omitted.
+    ``wait`` is called with ``duration``; passing a wait that returns early
+    (e.g. when a command arrives) cuts the step short.
+    """
+    if drive is None:
+        drive = drive_table(robot)
+    fn = drive[motion]
+    if fn is None:
+        # Already stopped: a second stop after the wait would be a redundant motor command
         robot.stop()
-        motion = "stop"
-    time.sleep(duration)
+        wait(duration)
+        return
+    fn(speed)
+    wait(duration)
     robot.stop()
 
 
+_INF = inf  # "no echo" distance sentinel
+
+# Command names that change what a running step should be doing
+_STEP_CHANGING_NAMES = frozenset(("toggle", "stop"))
+
+
+def _is_move(c: dict) -> bool:
+    """True for commands that would drive the robot (web or legacy moves)."""
+    return c.get("type") != "mode" and is_motion_name(c.get("name"))
+
+
+def _preempts_step(c: dict) -> bool:
+    """True for commands that should end a running motion step early."""
+    return c.get("type") == "mode" or c.get("name") in _STEP_CHANGING_NAMES
+
+
+def _is_mergeable_move(c: dict) -> bool:
+    """True for fire-and-forget web moves (no completion future to resolve)."""
+    return c.get("type") == "cmd" and "done" not in c and is_motion_name(c.get("name"))
+
+
+# Publish an unchanged state at least this often (in ticks) so late SSE
+# subscribers and /api/status consumers still see a heartbeat.
+STATE_HEARTBEAT_TICKS = 20
+
+# Upper bound on a blocking wait while stopped or idle. Commands wake the loop
+# immediately through the queue's event, so this only bounds how often the
+# loop re-checks config and housekeeping with nothing to do.
+IDLE_WAIT_S = 1.0
+
+# Identical web moves queued back to back (repeated clicks) run as one longer
+# move of up to this many steps, without a stop/start between them.
+MAX_MERGED_MOVES = 4
+
+
 class Controller:
-    def __init__(self, robot, sensor, logger_writer, hub, commands_q, keyboard=None, log_file="runlog.csv", config_manager: "ConfigManager | None" = None, policy_manager: "PolicyManager | None" = None):
+    def __init__(self, robot, sensor, logger_writer, hub, commands_q, keyboard=None, log_file="runlog.csv", config_manager: "ConfigManager | None" = None, policy_manager: "PolicyManager | None" = None, commands_q_maxsize: int = config.COMMANDS_Q_MAXSIZE):
         self.robot = robot
+        self._drive = drive_table(robot)  # bound drive methods, indexed by Motion
         # Store all sensors in a dict
         if isinstance(sensor, dict):
             self.sensors = sensor
@@ -43,7 +112,18 @@ class Controller:
             self.sensors = {'front': sensor}
             
         self.writer = logger_writer
+        # Writers that batch rows expose flush(); mode changes and stops push them out
+        self._flush_log = getattr(logger_writer, "flush", None) or (lambda: None)
         self.hub = hub
+        # Commands are bounded so a flooding client gets "queue full" instead of
+        # growing memory without limit
+        if commands_q is None:
+            commands_q = CommandQueue(maxsize=commands_q_maxsize)
+        # The loop relies on CommandQueue's popleft()/len(), which queue.Queue lacks
+        if not isinstance(commands_q, CommandQueue):
+            raise TypeError(f"commands_q must be a CommandQueue, not {type(commands_q).__name__}")
+        if commands_q.maxsize <= 0:
+            raise ValueError("commands_q must be bounded (maxsize > 0)")
         self.commands_q = commands_q
         self.keyboard = keyboard
         self.log_file = log_file
@@ -54,24 +134,113 @@ class Controller:
         if self.cfg is not None and hasattr(self.cfg, 'set_writer'):
             self.cfg.set_writer(self.writer)
 
-        self.current_motion = "stop"  # Start in stopped state
+        self.current_motion = Motion.STOP  # Start in stopped state
         self.current_speed = 0.0
         self.auto_mode = False  # True = AUTO mode, False = MANUAL/REMOTE mode
         self.emergency_stopped = False  # Track if we're in emergency stop state
+        self._last_state_hash = None  # Signature of the last published state
+        self._state_skips = 0  # Ticks suppressed since the last publish
+        self._last_idle_time = -_INF  # Monotonic time of the last idle sensor refresh
+        self._last_idle_snapshot = None  # Rounded distances last published while idle
+        self._cfg_version = None  # ConfigManager.version the caches were built from
+        self._parked = deque()  # Commands received while waiting, handled (in order) on the next drain
+        # Legacy command name -> handler; every driving motion shares _legacy_move
+        self._legacy_handlers = {
+            "toggle": self._legacy_toggle,
+            "auto": self._legacy_auto,
+            "stop": self._legacy_stop,
+        }
+        for name in MOTION_NAMES[Motion.FORWARD:]:
+            self._legacy_handlers[name] = self._legacy_move
+        # AUTO snapshot, updated in place every tick (fixed key order)
+        self._auto_state = {
+            "mode": "AUTO",
+            "front_distance_cm": None,
+            "left_distance_cm": None,
+            "right_distance_cm": None,
+            "executed_motion": "stop",
+            "executed_speed": 0.0,
+            "next_motion": "stop",
+            "next_speed": 0.0,
+            "notes": "",
+            "stuck": 0,
+            "queue_len": 0,
+            "log_file": self.log_file,
+        }
+        self._dist_cache = (-_INF, (_INF, _INF, _INF))  # (monotonic time, readings) of the last sensor read
+        self._sweep_s = 0.0  # duration of the last sensor sweep
+        # AUTO post-motion reads run on this worker so the sweep overlaps the end of the step
+        self._sensor_pool = None
+        self._step_done = threading.Event()
+        self._get_distances_tuple = (getattr(self.sensor, "get_distances_tuple", None)
+                                     or self._distances_from_dict)
+        self._ts_sec = None  # epoch second _ts_prefix was formatted for
+        self._ts_prefix = ""  # cached "YYYY-MM-DDTHH:MM:SS" for _iso_now
+        # REMOTE idle snapshot; only the distance fields change between publishes
+        self._idle_state = {
+            "mode": "REMOTE",
+            "front_distance_cm": None,
+            "left_distance_cm": None,
+            "right_distance_cm": None,
+            "executed_motion": "stop",
+            "executed_speed": 0.0,
+            "next_motion": "idle",
+            "next_speed": 0.0,
+            "notes": "remote_idle",
+            "stuck": 0,
+            "queue_len": 0,
+            "log_file": self.log_file,
+        }
+        self._reload_cfg()
 
     def _cfg(self, key, default):
         if self.cfg is not None:
             return self.cfg.get(key, default)
         return getattr(config, key, default)
 
+    def _reload_cfg(self):
+        """Rebuild the values cached from the configuration."""
+        tick_s = float(self._cfg("TICK_S", config.TICK_S))
+        move_s = float(self._cfg("MOVE_TICK_S", config.MOVE_TICK_S))
+        turn_s = float(self._cfg("TURN_TICK_S", config.TURN_TICK_S))
+        # Step duration indexed by Motion value
+        self._dur_table = (tick_s, move_s, move_s, turn_s, turn_s)
+        self._tick_s = tick_s
+        forward_spd = float(self._cfg("FORWARD_SPD", config.FORWARD_SPD))
+        back_spd = float(self._cfg("BACK_SPD", config.BACK_SPD))
+        turn_spd = float(self._cfg("TURN_SPD", config.TURN_SPD))
+        # Default speed indexed by Motion value (unknown motions use forward speed)
+        self._spd_table = (forward_spd, forward_spd, back_spd, turn_spd, turn_spd)
+        self._idle_sample_s = float(self._cfg("IDLE_SAMPLE_S", config.IDLE_SAMPLE_S))
+        self._cfg_version = getattr(self.cfg, "version", 0)
+
+    def _check_cfg(self):
+        """Reload the cached configuration if the overrides changed."""
+        if getattr(self.cfg, "version", 0) != self._cfg_version:
+            self._reload_cfg()
+
     def emergency_stop(self):
         """Immediately stop all robot movement and clear all state."""
         try:
             self.robot.stop()
-            self.queued_moves.clear()
-            self.current_motion = "stop"
+            # Fail any moves still waiting so stale ones don't run after the stop;
+            # other commands (e.g. a mode change sent right after it) keep their order
+            kept = []
+            while True:
+                c = self._pop_command()
+                if c is None:
+                    break
+                if _is_move(c):
+                    self._abort_command(c, "aborted by emergency stop")
+                else:
+                    kept.append(c)
+            self._parked.extend(kept)
+            self.current_motion = Motion.STOP
             self.current_speed = 0.0
             self.emergency_stopped = True  # Set emergency stop flag
+            self._last_state_hash = None  # Force the next state to be published
+            self._last_idle_snapshot = None
+            self._flush_log()  # Keep the rows leading up to the stop if power is cut next
             
             # Broadcast the emergency stop
             self._broadcast({
@@ -88,19 +257,47 @@ class Controller:
             })
             return True
         except Exception as e:
-            print(f"Emergency stop error: {e}")
+            log.error("Emergency stop error: %s", e)
             return False
 
     def _broadcast(self, msg: dict):
+        """Send a one-off message to dashboard clients; callers always set ``mode``."""
+        assert "mode" in msg, "broadcast messages must carry a mode"
         try:
-            # Ensure mode is set correctly based on auto_mode
-            if 'mode' not in msg:
-                msg = msg.copy()  # Don't modify the original
-                msg['mode'] = 'AUTO' if self.auto_mode else 'REMOTE'
-            self.hub.broadcast(json.dumps(msg))
+            if self.hub.has_clients():
+                self.hub.broadcast(encode_json(msg))
         except Exception:
             pass
-            
+
+    def _publish_state(self, state: dict):
+        """Publish a state snapshot to the hub, skipping unchanged ones.
+
+        Identical consecutive snapshots are suppressed, except for a heartbeat
+        every STATE_HEARTBEAT_TICKS ticks.
+        """
+        h = (
+            state["mode"],
+            state["executed_motion"],
+            state["executed_speed"],
+            state["next_motion"],
+            state["notes"],
+            state["stuck"],
+            state["queue_len"],
+            state["front_distance_cm"],
+            state["left_distance_cm"],
+            state["right_distance_cm"],
+        )
+        if h == self._last_state_hash and self._state_skips < STATE_HEARTBEAT_TICKS:
+            self._state_skips += 1
+            return
+        self._last_state_hash = h
+        self._state_skips = 0
+        self._last_idle_snapshot = None  # Any new publish means the idle state must be re-sent
+        try:
+            self.hub.publish(state)  # serialized by the hub only when clients are connected
+        except Exception:
+            pass
+
     def execute_command_sequence(self, commands):
         """Execute a sequence of commands and return the execution log.
         
@@ -117,17 +314,19 @@ class Controller:
         if not commands or not isinstance(commands, list):
             return {"success": False, "error": "No commands provided"}
             
-        log = []
+        entries = []
+        self._check_cfg()
 
         for cmd in commands:
             if not isinstance(cmd, dict) or 'name' not in cmd:
                 return {
                     "success": False, 
                     "error": f"Invalid command: {cmd}",
-                    "log": log
+                    "log": entries
                 }
 
             name = cmd["name"]
+            motion = parse_motion(name)
 
             # Get duration in seconds (convert from ms if needed)
             duration_s = cmd.get('duration_s')
@@ -135,47 +334,49 @@ class Controller:
                 duration_s = cmd['duration_ms'] / 1000.0
             if duration_s is None:
                 # Default duration comes from configured tick values (with overrides applied)
-                duration_s = self._duration_for_motion(name)
+                duration_s = self._duration_for_motion(motion)
 
             # Resolve speed, defaulting to configured values (respecting overrides)
             speed = cmd.get("speed")
             if speed is None:
-                if name == "forward":
-                    speed = float(self._cfg("FORWARD_SPD", config.FORWARD_SPD))
-                elif name == "backward":
-                    speed = float(self._cfg("BACK_SPD", config.BACK_SPD))
-                elif name in ("left", "right"):
-                    speed = float(self._cfg("TURN_SPD", config.TURN_SPD))
-                else:
-                    # Fallback – use forward speed for unknown motions
-                    speed = float(self._cfg("FORWARD_SPD", config.FORWARD_SPD))
+                speed = self._speed_for_motion(motion)
             else:
                 speed = float(speed)
 
-            # Prepare the command for the queue
+            # Prepare the command for the queue; run() resolves "done" once handled
+            done = concurrent.futures.Future()
             cmd_data = {
                 "type": "cmd",
                 "name": name,
                 "speed": speed,
-                "duration_s": duration_s
+                "duration_s": duration_s,
+                "done": done,
             }
             
             try:
-                # Get state before command execution
-                state = self._get_current_state()
+                # Queue the command, failing fast rather than blocking when full
+                try:
+                    self.commands_q.put_nowait(cmd_data)
+                except queue.Full:
+                    return {"success": False, "error": "queue full", "log": entries}
                 
-                # Execute the command
-                self.commands_q.put_nowait(cmd_data)
-                
-                # Wait for the command to complete (duration + small buffer)
-                time.sleep(duration_s + 0.1)
-                
-                # Get state after command execution
-                state = self._get_current_state()
+                # Wait for run() to finish the command and report the resulting state
+                timeout_s = duration_s * 2 + 1
+                try:
+                    state = done.result(timeout=timeout_s)
+                except concurrent.futures.TimeoutError:
+                    # Withdraw it so run() skips it; if it already started, let it finish
+                    if done.cancel():
+                        return {
+                            "success": False,
+                            "error": f"Command {name} timed out after {timeout_s:.2f}s waiting in the queue",
+                            "log": entries,
+                        }
+                    state = done.result()
                 
                 # Create log entry
                 log_entry = {
-                    "timestamp": state.get("timestamp", datetime.datetime.utcnow().isoformat()),
+                    "timestamp": state.get("timestamp") or self._iso_now(),
                     "mode": state.get("mode", "REMOTE"),
                     "front_distance_cm": state.get("front_distance_cm"),
                     "left_distance_cm": state.get("left_distance_cm"),
@@ -186,27 +387,149 @@ class Controller:
                     "next_speed": 0.0,
                     "notes": f"Executed {name} for {duration_s:.2f}s",
                     "stuck_triggered": 0,
-                    "queue_len": self.commands_q.qsize()
+                    "queue_len": len(self.commands_q)
                 }
-                log.append(log_entry)
-                
-                # Broadcast the updated state
-                self._broadcast({
-                    **state,
-                    "executed_motion": name,
-                    "executed_speed": speed,
-                    "log_file": self.log_file
-                })
+                entries.append(log_entry)
+                # run() already published this state; re-broadcasting it would only duplicate the frame
                 
             except Exception as e:
                 return {
                     "success": False, 
                     "error": f"Error executing command {cmd}: {str(e)}",
-                    "log": log
+                    "log": entries
                 }
         
-        return {"success": True, "log": log}
+        return {"success": True, "log": entries}
         
+    def _iso_now(self) -> str:
+        """UTC ISO-8601 timestamp with microseconds.
+
+        The ``YYYY-MM-DDTHH:MM:SS`` part is formatted once per second and
+        reused; only the fractional tail is rendered per call.
+        """
+        sec, ns = divmod(time.time_ns(), 1_000_000_000)
+        if sec != self._ts_sec:
+            self._ts_sec = sec
+            self._ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        return f"{self._ts_prefix}.{ns // 1000:06d}+00:00"
+
+    def _read_distances(self, max_age: float = 0.05):
+        """Return ``(front, left, right)`` readings in cm, reusing the last batch if it is younger than ``max_age`` seconds.
+
+        The age is measured from the end of the read, so the post-motion
+        reading of one AUTO tick also serves as the decision reading of the
+        next one even when a sensor sweep itself takes longer than ``max_age``.
+        """
+        t, d = self._dist_cache
+        if time.monotonic() - t < max_age:
+            return d
+        return self._sweep()
+
+    def _sweep(self):
+        """Read all sensors now, recording the result and how long the sweep took."""
+        t0 = time.monotonic()
+        d = self._get_distances_tuple()
+        t1 = time.monotonic()
+        self._sweep_s = t1 - t0
+        self._dist_cache = (t1, d)
+        return d
+
+    def _sweep_after(self, delay: float):
+        """Sensor-worker task: sweep after ``delay`` seconds, or as soon as the step ends."""
+        self._step_done.wait(delay)
+        return self._sweep()
+
+    def _distances_from_dict(self):
+        """Fallback for sensors that only provide ``get_distances()``."""
+        d = self.sensor.get_distances()
+        return d.get('front', _INF), d.get('left', _INF), d.get('right', _INF)
+
+    def _next_command(self):
+        """Return the next command without blocking, or None.
+
+        Identical fire-and-forget moves that follow each other are merged
+        into one carrying their count in ``"steps"`` (at most
+        MAX_MERGED_MOVES), so the total driving time is kept.
+        """
+        c = self._pop_command()
+        if c is None or not _is_mergeable_move(c):
+            return c
+        steps = 1
+        while steps < MAX_MERGED_MOVES:
+            nxt = self._pop_command()
+            if nxt is None:
+                break
+            if nxt != c:
+                self._parked.appendleft(nxt)  # Not the same move: it goes next
+                break
+            steps += 1
+        if steps > 1:
+            c = dict(c, steps=steps)
+        return c
+
+    def _pop_command(self):
+        """Return the next parked or queued command without blocking, or None."""
+        if self._parked:
+            return self._parked.popleft()
+        try:
+            return self.commands_q.popleft()
+        except IndexError:
+            return None
+
+    def _wait_for_command(self, timeout: float):
+        """Block for up to ``timeout`` seconds, returning early when a command arrives.
+
+        The command is kept aside and handled by the next drain, so idle
+        loops react to new commands immediately instead of after a fixed sleep.
+        """
+        if self._parked:
+            return
+        try:
+            self._parked.append(self.commands_q.get(timeout=timeout))
+        except queue.Empty:
+            pass
+
+    def _wait_step(self, duration: float):
+        """Wait out a motion step, ending it early only for a command that changes it.
+
+        Mode changes, toggles and stops cut the step short, in AUTO and for
+        REMOTE moves alike. Anything else (e.g. further drive commands) is
+        parked for the next drain while the step runs its full ``duration``.
+        """
+        parked = self._parked
+        if any(map(_preempts_step, parked)):
+            return
+        deadline = time.monotonic() + duration
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                c = self.commands_q.get(timeout=remaining)
+            except queue.Empty:
+                return
+            parked.append(c)
+            if _preempts_step(c):
+                return
+
+    def _complete_command(self, c: dict, state: "dict | None" = None):
+        """Resolve the command's completion future, if it carries one."""
+        done = c.get("done")
+        if done is not None and not done.done():
+            try:
+                done.set_result(state if state is not None else self._get_current_state())
+            except concurrent.futures.InvalidStateError:
+                pass  # Cancelled by its caller in the meantime
+
+    def _abort_command(self, c: dict, reason: str):
+        """Fail the command's completion future, so its caller stops with an error."""
+        done = c.get("done")
+        if done is not None and not done.done():
+            try:
+                done.set_exception(RuntimeError(reason))
+            except concurrent.futures.InvalidStateError:
+                pass  # Cancelled by its caller in the meantime
+
     def _get_current_state(self):
         """Helper method to get the current robot state from the hub."""
         if hasattr(self.hub, 'get_state'):
@@ -216,321 +539,295 @@ class Controller:
             return state
         return {}
 
+    def _handle_mode(self, c: dict):
+        """Switch between AUTO and REMOTE as requested by a ``mode`` message."""
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[CMD] Received command: %s", c)
+        self.robot.stop()
+        self.emergency_stopped = False  # An explicit mode choice clears an emergency stop
+        self.auto_mode = (c.get("mode") == "AUTO")
+        self._flush_log()
+
+    def _handle_cmd(self, c: dict):
+        """Handle a ``cmd`` message from the web API and resolve its future."""
+        done = c.get("done")
+        if done is not None and not done.set_running_or_notify_cancel():
+            return  # The caller timed out and withdrew it
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[CMD] Received command: %s", c)
+        name = c.get("name")
+        result = None
+        # Toggle between AUTO and REMOTE modes
+        if name == 'toggle':
+            self.emergency_stopped = False  # Clear emergency stop
+            self.auto_mode = not self.auto_mode
+            log.info("[TOGGLE] Mode toggled to: %s", 'AUTO' if self.auto_mode else 'REMOTE')
+            self.robot.stop()
+            self._flush_log()
+        elif name == 'auto':
+            self.emergency_stopped = False  # Clear emergency stop
+            self.auto_mode = True
+            self.robot.stop()
+            self._flush_log()
+        # Moves stay refused until a mode change or toggle clears an emergency stop
+        elif self.emergency_stopped and is_motion_name(name):
+            self._abort_command(c, "refused: emergency stop is active")
+            return
+        # Handle movement commands in REMOTE mode
+        elif not self.auto_mode and is_motion_name(name):
+            motion = parse_motion(name)
+            speed = c.get("speed")
+            if speed is None:
+                speed = self._speed_for_motion(motion)
+            duration_ms = c.get("duration_ms")
+            duration_s = c.get("duration_s")
+            duration_s = (
+                float(duration_ms) / 1000.0 if duration_ms is not None
+                else float(duration_s) if duration_s is not None
+                else self._tick_s
+            ) * c.get("steps", 1)
+            result = self._remote_move(name, motion, float(speed), duration_s)
+        elif name == 'stop':
+            # Emergency stop - clear all state and stop immediately
+            self.emergency_stop()
+        # ignore if not in REMOTE
+        self._complete_command(c, result)
+
+    def _handle_legacy(self, c: dict):
+        """Handle a bare command name (wrapped by CommandQueue) from the keyboard."""
+        name = c.get("name")
+        handler = self._legacy_handlers.get(name)
+        if handler is not None:
+            handler(name)
+
+    def _legacy_toggle(self, name: str):
+        if self.emergency_stopped:
+            self.emergency_stopped = False  # Clear emergency stop
+        self.auto_mode = not self.auto_mode
+        self.robot.stop()
+        self._flush_log()
+
+    def _legacy_auto(self, name: str):
+        self.emergency_stopped = False  # Clear emergency stop
+        self.auto_mode = True
+        self.robot.stop()
+        self._flush_log()
+
+    def _legacy_stop(self, name: str):
+        # Emergency stop - clear all state and stop immediately
+        self.emergency_stop()
+
+    def _legacy_move(self, name: str):
+        # Only process movement commands in REMOTE mode, and not while emergency stopped
+        if self.auto_mode or self.emergency_stopped:
+            return
+        motion = parse_motion(name)
+        self._remote_move(name, motion, float(self._speed_for_motion(motion)), self._duration_for_motion(motion))
+
+    def _remote_move(self, name: str, motion: Motion, speed: float, duration_s: float) -> dict:
+        """Execute one REMOTE move, then log it and publish the resulting state."""
+        # A stop (or mode change) arriving mid-move cuts it short
+        execute_motion(self.robot, motion, speed, duration_s, self._drive, self._wait_step)
+
+        try:
+            front_d, left_d, right_d = self._read_distances()
+        except Exception:
+            front_d = left_d = right_d = _INF
+
+        mode = "REMOTE"
+        queue_len = len(self.commands_q)
+        notes = f"remote_{name}"
+
+        # Write to CSV log if a writer is available
+        if callable(self.writer):
+            self.writer([
+                mode,
+                front_d,
+                left_d,
+                right_d,
+                name,
+                speed,
+                "idle",
+                0.0,
+                notes,
+                0,
+                queue_len,
+            ])
+
+        front_r, left_r, right_r = _pack_distances(front_d, left_d, right_d)
+        state = {
+            "mode": mode,
+            "front_distance_cm": front_r,
+            "left_distance_cm": left_r,
+            "right_distance_cm": right_r,
+            "executed_motion": name,
+            "executed_speed": speed,
+            "next_motion": "idle",
+            "next_speed": 0.0,
+            "notes": notes,
+            "stuck": 0,
+            "queue_len": queue_len,
+            "log_file": self.log_file,
+        }
+        self._publish_state(state)
+        return state
+
     def run(self):
+        # Bind stable attributes and bound methods once; the loop then uses fast locals
+        robot = self.robot
+        drive = self._drive
+        writer = self.writer
+        policy = self.policy
+        read_distances = self._read_distances
+        publish_state = self._publish_state
+        wait_for_command = self._wait_for_command
+        wait_step = self._wait_step
+        next_command = self._next_command
+        check_cfg = self._check_cfg
+        step_done = self._step_done
+        sensor_pool = self._sensor_pool
+        handlers = {
+            "cmd": self._handle_cmd,
+            "mode": self._handle_mode,
+            "legacy": self._handle_legacy,
+        }
         try:
             while True:
+                check_cfg()
 
                 # Drain web commands
-                if self.commands_q is not None:
-                    while True:
-                        try:
-                            c = self.commands_q.get_nowait()
-                        except Exception:
-                            break
-                        # New dict-based commands
-                        if isinstance(c, dict):
-                            print(f"[CMD] Received command: {c}")  # Debug
-                            if c.get("type") == "mode":
-                                mode = c.get("mode")
-                                self.robot.stop()
-                                self.auto_mode = (mode == "AUTO")
-                            elif c.get("type") == "cmd":
-                                name = c.get("name")
-                                speed = c.get("speed")
-                                duration_ms = c.get("duration_ms")
-                                duration_s_req = c.get("duration_s")
-                                # Toggle between AUTO and REMOTE modes
-                                if name == 'toggle':
-                                    self.auto_mode = not self.auto_mode
-                                    print(f"[TOGGLE] Mode toggled to: {'AUTO' if self.auto_mode else 'REMOTE'}")
-                                    self.robot.stop()
-                                    continue
-                                if name == 'auto':
-                                    self.auto_mode = True
-                                    self.robot.stop()
-                                    continue
-                                # Handle movement commands in REMOTE mode
-                                if not self.auto_mode and name in ("forward", "backward", "left", "right"):
-                                    if speed is None:
-                                        if name == "forward":
-                                            speed = float(self._cfg("FORWARD_SPD", config.FORWARD_SPD))
-                                        elif name == "backward":
-                                            speed = float(self._cfg("BACK_SPD", config.BACK_SPD))
-                                        else:
-                                            speed = float(self._cfg("TURN_SPD", config.TURN_SPD))
-                                    
-                                    duration_s = (
-                                        float(duration_ms) / 1000.0 if duration_ms is not None
-                                        else float(duration_s_req) if duration_s_req is not None
-                                        else float(self._cfg("TICK_S", config.TICK_S))
-                                    )
-                                    
-                                    # Execute the move immediately
-                                    execute_motion(self.robot, name, float(speed), duration_s)
-                                    
-                                    # After executing the move in REMOTE mode, log it and broadcast state
-                                    try:
-                                        distances = self.sensor.get_distances()
-                                        front_d = distances.get('front', float('inf'))
-                                        left_d = distances.get('left', float('inf'))
-                                        right_d = distances.get('right', float('inf'))
-                                    except Exception:
-                                        front_d = left_d = right_d = float('inf')
-
-                                    mode = "REMOTE"
-                                    queue_len = self.commands_q.qsize() if self.commands_q is not None else 0
-                                    notes = f"remote_{name}"
-
-                                    # Write to CSV log if a writer is available
-                                    if callable(self.writer):
-                                        self.writer([
-                                            mode,
-                                            front_d,
-                                            left_d,
-                                            right_d,
-                                            name,
-                                            float(speed),
-                                            "idle",
-                                            0.0,
-                                            notes,
-                                            0,
-                                            queue_len,
-                                        ])
-
-                                    # Broadcast updated state
-                                    state = {
-                                        "mode": mode,
-                                        "front_distance_cm": (None if front_d == float('inf') else round(front_d, 2)),
-                                        "left_distance_cm": (None if left_d == float('inf') else round(left_d, 2)),
-                                        "right_distance_cm": (None if right_d == float('inf') else round(right_d, 2)),
-                                        "executed_motion": name,
-                                        "executed_speed": float(speed),
-                                        "next_motion": "idle",
-                                        "next_speed": 0.0,
-                                        "notes": notes,
-                                        "stuck": 0,
-                                        "queue_len": queue_len,
-                                        "log_file": self.log_file,
-                                    }
-                                    self._broadcast(state)
-                                    try:
-                                        self.hub.set_state(state)
-                                    except Exception:
-                                        pass
-                                elif name == 'stop':
-                                    # Emergency stop - clear all state and stop immediately
-                                    self.emergency_stop()
-                                # ignore if not in REMOTE
-                        else:
-                            # Legacy string commands from dashboard keyboard
-                            if c == 'toggle':
-                                if self.emergency_stopped:
-                                    self.emergency_stopped = False  # Clear emergency stop
-                                self.auto_mode = not self.auto_mode
-                                self.robot.stop()
-                            elif c == 'auto':
-                                self.auto_mode = True
-                                self.robot.stop()
-                            elif c == 'stop':
-                                # Emergency stop - clear all state and stop immediately
-                                self.emergency_stop()
-                            elif c in ('forward','backward','left','right') and not self.auto_mode:
-                                # Only process movement commands in REMOTE mode
-                                spd = (self._cfg("FORWARD_SPD", config.FORWARD_SPD) if c == "forward"
-                                       else self._cfg("BACK_SPD", config.BACK_SPD) if c == "backward"
-                                       else self._cfg("TURN_SPD", config.TURN_SPD))
-                                duration_s = self._duration_for_motion(c)
-                                execute_motion(self.robot, c, float(spd), duration_s)
-
-                                # After executing the move in REMOTE mode, log it and broadcast state
-                                try:
-                                    distances = self.sensor.get_distances()
-                                    front_d = distances.get('front', float('inf'))
-                                    left_d = distances.get('left', float('inf'))
-                                    right_d = distances.get('right', float('inf'))
-                                except Exception:
-                                    front_d = left_d = right_d = float('inf')
-
-                                mode = "REMOTE"
-                                queue_len = self.commands_q.qsize() if self.commands_q is not None else 0
-                                notes = f"remote_{c}"
-
-                                if callable(self.writer):
-                                    self.writer([
-                                        mode,
-                                        front_d,
-                                        left_d,
-                                        right_d,
-                                        c,
-                                        float(spd),
-                                        "idle",
-                                        0.0,
-                                        notes,
-                                        0,
-                                        queue_len,
-                                    ])
-
-                                state = {
-                                    "mode": mode,
-                                    "front_distance_cm": (None if front_d == float('inf') else round(front_d, 2)),
-                                    "left_distance_cm": (None if left_d == float('inf') else round(left_d, 2)),
-                                    "right_distance_cm": (None if right_d == float('inf') else round(right_d, 2)),
-                                    "executed_motion": c,
-                                    "executed_speed": float(spd),
-                                    "next_motion": "idle",
-                                    "next_speed": 0.0,
-                                    "notes": notes,
-                                    "stuck": 0,
-                                    "queue_len": queue_len,
-                                    "log_file": self.log_file,
-                                }
-                                self._broadcast(state)
-                                try:
-                                    self.hub.set_state(state)
-                                except Exception:
-                                    pass
-
-                # If in emergency stop, stay stopped until explicitly cleared
+                while True:
+                    c = next_command()
+                    if c is None:
+                        break
+                    handler = handlers.get(c.get("type"))
+                    if handler is not None:
+                        handler(c)
+
+                # If in emergency stop, stay stopped until a command clears it
                 if self.emergency_stopped:
-                    time.sleep(0.1)
+                    wait_for_command(IDLE_WAIT_S)
                     continue
                     
                 # If in REMOTE mode, idle (no motion)
                 if not self.auto_mode:
-                    # Only update state if it's changed from the last broadcast
-                    if not hasattr(self, '_last_idle_state') or time.time() - getattr(self, '_last_idle_time', 0) > 5.0:
-                        # Get readings from all sensors
-                        distances = self.sensor.get_distances()
-                        front_d = distances.get('front', float('inf'))
-                        left_d = distances.get('left', float('inf'))
-                        right_d = distances.get('right', float('inf'))
-                        
-                        state = {
-                            "mode": "REMOTE",
-                            "front_distance_cm": (None if front_d == float('inf') else round(front_d, 2)),
-                            "left_distance_cm": (None if left_d == float('inf') else round(left_d, 2)),
-                            "right_distance_cm": (None if right_d == float('inf') else round(right_d, 2)),
-                            "executed_motion": "stop",
-                            "executed_speed": 0.0,
-                            "next_motion": "idle",
-                            "next_speed": 0.0,
-                            "notes": "remote_idle",
-                            "stuck": 0,
-                            "queue_len": 0,
-                            "log_file": self.log_file,
-                        }
-                        self._broadcast(state)
-                        try:
-                            self.hub.set_state(state)
-                        except Exception:
-                            pass
-                        self._last_idle_state = state
-                        self._last_idle_time = time.time()
-                    time.sleep(0.1)  # Prevent busy-waiting
+                    # Refresh the idle readings every few seconds; publish only if they changed
+                    now = time.monotonic()
+                    if now - self._last_idle_time > self._idle_sample_s:
+                        self._last_idle_time = now
+                        snapshot = _pack_distances(*read_distances())
+                        if snapshot != self._last_idle_snapshot:
+                            state = self._idle_state
+                            (state["front_distance_cm"], state["left_distance_cm"],
+                             state["right_distance_cm"]) = snapshot
+                            publish_state(state)
+                            self._last_idle_snapshot = snapshot
+                    # Sleep until a command arrives or the next idle refresh is due
+                    wait_for_command(min(IDLE_WAIT_S, self._last_idle_time + self._idle_sample_s - time.monotonic()))
                     continue
 
-
-                # Auto branch - skip if emergency stopped
-                if self.emergency_stopped:
-                    time.sleep(0.1)
-                    continue
+                # AUTO MODE LOGIC - REMOTE and emergency stop were handled above
+                # Get sensor readings for decision making
+                front_d, left_d, right_d = read_distances()
                 
-                # AUTO MODE LOGIC - only execute when in AUTO mode
-                if self.auto_mode:
-                    print(f"[AUTO] Starting AUTO mode iteration")  # Debug logging
-                    
-                    # Get sensor readings for decision making
-                    distances = self.sensor.get_distances()
-                    front_d = distances.get('front', float('inf'))
-                    left_d = distances.get('left', float('inf'))
-                    right_d = distances.get('right', float('inf'))
-                    
-                    # Update policy with current distance reading
-                    if self.policy is not None:
-                        self.policy.update_distance(front_d)
-                        
-                        # Get next action from policy
-                        next_motion, next_speed, notes, is_recovery = self.policy.get_next_action(
-                            self.current_motion, front_d
-                        )
-                        
-                        print(f"[AUTO] Policy decision: {next_motion} @ {next_speed:.2f} (distance: {front_d:.1f}cm, notes: {notes})")  # Debug
-                    else:
-                        # Fallback if no policy
-                        next_motion, next_speed = "stop", 0.0
-                        notes = "no_policy"
-                        is_recovery = False
+                # Update policy with current distance reading
+                if policy is not None:
+                    policy.update_distance(front_d)
                     
-                    # Update current motion and speed
-                    self.current_motion, self.current_speed = next_motion, next_speed
+                    # Get next action from policy
+                    next_motion, next_speed, notes, is_recovery = policy.get_next_action(
+                        MOTION_NAMES[self.current_motion], front_d
+                    )
                     
-                    # Execute the motion
-                    execute_motion(self.robot, self.current_motion, self.current_speed, 
-                                 self._duration_for_motion(self.current_motion))
-                    
-                    # Get fresh sensor readings for logging
-                    distances = self.sensor.get_distances()
-                    front_d = distances.get('front', float('inf'))
-                    left_d = distances.get('left', float('inf'))
-                    right_d = distances.get('right', float('inf'))
-                    
-                    # Get queue length and stuck status from policy
-                    queue_len = self.policy.get_queue_length() if self.policy else 0
-                    stuck_triggered = 1 if (self.policy and self.policy.is_stuck_triggered()) else 0
-                    mode = "RECOVERY" if is_recovery else "AUTO"
-                    
-                    # Log the action with all sensor readings
-                    self.writer([
-                        mode,
-                        front_d,
-                        left_d,
-                        right_d,
-                        self.current_motion,
-                        self.current_speed,
-                        self.current_motion,  # next_motion is current since we just decided
-                        self.current_speed,
-                        notes,
-                        stuck_triggered,
-                        queue_len
-                    ])
-                    # Broadcast the state with all sensor readings
-                    state = {
-                        "mode": mode,
-                        "front_distance_cm": (None if front_d == float('inf') else round(front_d, 2)),
-                        "left_distance_cm": (None if left_d == float('inf') else round(left_d, 2)),
-                        "right_distance_cm": (None if right_d == float('inf') else round(right_d, 2)),
-                        "executed_motion": self.current_motion,
-                        "executed_speed": round(self.current_speed, 2),
-                        "next_motion": self.current_motion,
-                        "next_speed": self.current_speed,
-                        "notes": notes,
-                        "stuck": stuck_triggered,
-                        "queue_len": queue_len,
-                        "log_file": self.log_file,
-                    }
-                    self._broadcast(state)
-                    try:
-                        self.hub.set_state(state)
-                    except Exception:
-                        pass
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("[AUTO] Policy decision: %s @ %.2f (distance: %.1fcm, notes: %s)",
+                                  next_motion, next_speed, front_d, notes)
+                else:
+                    # Fallback if no policy
+                    next_motion, next_speed = "stop", 0.0
+                    notes = "no_policy"
+                    is_recovery = False
+                
+                # Update current motion and speed
+                motion = parse_motion(next_motion)
+                speed = next_speed
+                self.current_motion, self.current_speed = motion, speed
+                motion_name = MOTION_NAMES[motion]
+                
+                # Start the post-motion sweep so it finishes as the step does,
+                # rather than adding the sweep time on top of every tick
+                duration = self._dur_table[motion]
+                step_done.clear()
+                if sensor_pool is None:
+                    sensor_pool = self._sensor_pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="sensor")
+                sweep = sensor_pool.submit(self._sweep_after, duration - self._sweep_s)
+
+                # Execute the motion; a mode change, toggle or stop ends the step
+                # early, other commands are parked until the step completes
+                try:
+                    execute_motion(robot, motion, speed, duration, drive, wait_step)
+                finally:
+                    step_done.set()
+
+                # Fresh sensor readings for logging (and the next decision)
+                front_d, left_d, right_d = sweep.result()
+                
+                # Get queue length, stuck status and the upcoming move from policy once per tick
+                next_name, next_spd = motion_name, speed
+                if policy is not None:
+                    queue_len = policy.get_queue_length()
+                    stuck_triggered = 1 if policy.is_stuck_triggered() else 0
+                    queued = policy.peek_queued_move()
+                    if queued is not None:
+                        next_name, next_spd = queued
                 else:
-                    # Not in AUTO mode - reached the bottom of the loop without handling
-                    print(f"[DEBUG] End of loop: auto_mode={self.auto_mode}, queued_moves={len(self.queued_moves)}")
-                    time.sleep(0.1)  # Prevent busy looping
+                    queue_len = stuck_triggered = 0
+                mode = "RECOVERY" if is_recovery else "AUTO"
+                
+                # Log the action with all sensor readings
+                writer([
+                    mode,
+                    front_d,
+                    left_d,
+                    right_d,
+                    motion_name,
+                    speed,
+                    next_name,  # queued recovery move, else the motion just executed
+                    next_spd,
+                    notes,
+                    stuck_triggered,
+                    queue_len
+                ])
+                # Broadcast the state with all sensor readings
+                state = self._auto_state
+                state["mode"] = mode
+                (state["front_distance_cm"], state["left_distance_cm"],
+                 state["right_distance_cm"]) = _pack_distances(front_d, left_d, right_d)
+                state["executed_motion"] = motion_name
+                state["executed_speed"] = round(speed, 2)
+                state["next_motion"] = next_name
+                state["next_speed"] = next_spd
+                state["notes"] = notes
+                state["stuck"] = stuck_triggered
+                state["queue_len"] = queue_len
+                publish_state(state)
         finally:
             try:
                 self.robot.stop()
             except Exception:
                 pass
+            if self._sensor_pool is not None:
+                self._step_done.set()
+                self._sensor_pool.shutdown(wait=True)
+                self._sensor_pool = None
             try:
                 self.sensor.close()
             except Exception:
                 pass
 
-    def _duration_for_motion(self, motion: str):
-        if motion in ["forward", "backward"]:
-            return float(self._cfg("MOVE_TICK_S", config.MOVE_TICK_S))
-        elif motion in ["left", "right"]:
-            return float(self._cfg("TURN_TICK_S", config.TURN_TICK_S))
-        else:
-            return float(self._cfg("TICK_S", config.TICK_S))
+    def _duration_for_motion(self, motion: Motion):
+        return self._dur_table[motion]
+
+    def _speed_for_motion(self, motion: Motion):
+        return self._spd_table[motion]
@@ -4,6 +4,17 @@ import threading
 import termios
 import tty
 import select
+from collections import deque
+
+
+# Reduce a raw read to the bytes we act on in one C-level pass: fold WASD to
+# lower case and delete everything else except Enter.
+_KEY_FOLD = bytes.maketrans(b"WASD", b"wasd")
+_KEY_DROP = bytes(b for b in range(256) if b not in b"wasdWASD\r\n")
+_DRIVE_KEYS = ((ord("w"), "forward"), (ord("s"), "backward"), (ord("a"), "left"), (ord("d"), "right"))
+
+# Events kept for pop_event; older ones are dropped first when nobody reads them
+_MAX_EVENTS = 64
 
 
 class CbreakKeyboard:
@@ -26,8 +37,7 @@ class CbreakKeyboard:
         self._fd = fd
         self._old = termios.tcgetattr(self._fd)
         tty.setcbreak(self._fd)
-        self._lock = threading.Lock()
-        self._events = []
+        self._events = deque(maxlen=_MAX_EVENTS)
         self._stop = False
         self._thread = threading.Thread(target=self._run, daemon=True)
 
@@ -48,12 +58,13 @@ class CbreakKeyboard:
             pass
 
     def _push(self, ev):
-        with self._lock:
-            self._events.append(ev)
+        self._events.append(ev)
 
     def pop_event(self):
-        with self._lock:
-            return self._events.pop(0) if self._events else None
+        try:
+            return self._events.popleft()
+        except IndexError:
+            return None
 
     def _run(self):
         while not self._stop:
@@ -66,24 +77,13 @@ class CbreakKeyboard:
                 continue
             if not data:
                 continue
-            try:
-                buf = data.decode('utf-8', errors='ignore')
-            except Exception:
+            keys = data.translate(_KEY_FOLD, _KEY_DROP)
+            if not keys:
                 continue
 
-            for ch in buf:
-                if ch in ('\r', '\n'):
-                    self._push(('TOGGLE', None))
-                    continue
-
-            lower = buf.lower()
-            if 'w' in lower:
-                self._push(('CMD', 'forward'))
-            if 's' in lower:
-                self._push(('CMD', 'backward'))
-            if 'a' in lower:
-                self._push(('CMD', 'left'))
-            if 'd' in lower:
-                self._push(('CMD', 'right'))
-
+            for _ in range(keys.count(b'\r') + keys.count(b'\n')):
+                self._push(('TOGGLE', None))
 
+            for key, name in _DRIVE_KEYS:
+                if key in keys:
+                    self._push(('CMD', name))
@@ -0,0 +1,30 @@
+"""Motion codes shared by the controller and the actuator layer."""
+from __future__ import annotations
+from enum import IntEnum
+
+
+class Motion(IntEnum):
+    STOP = 0
+    FORWARD = 1
+    BACKWARD = 2
+    LEFT = 3
+    RIGHT = 4
+
+
+# Wire/log names, indexed by Motion value
+MOTION_NAMES = ("stop", "forward", "backward", "left", "right")
+
+_BY_NAME = {name: Motion(i) for i, name in enumerate(MOTION_NAMES)}
+
+
+def parse_motion(name) -> Motion:
+    """Map a motion name (or Motion) to a Motion; unknown names mean STOP."""
+    if isinstance(name, Motion):
+        return name
+    return _BY_NAME.get(name, Motion.STOP)
+
+
+def is_motion_name(name) -> bool:
+    """True for the four driving motions ("stop" excluded)."""
+    m = _BY_NAME.get(name)
+    return m is not None and m != Motion.STOP
@@ -3,11 +3,18 @@ try:
 except Exception:
     import config  # type: ignore
 
-import random
+import logging
+from random import getrandbits
+from math import inf
 from collections import deque
 from collections.abc import Collection
 from typing import Tuple, Optional
 
+log = logging.getLogger(__name__)
+
+_TURNS = ("left", "right")
+_NOTE_NO_ECHO = "no-echo: waiting for valid reading"
+_NOTE_CLEAR = "clear"
 
 class Policy:
     """
@@ -29,11 +36,26 @@ class Policy:
         """
         self.config = config_obj if config_obj is not None else config
         
+        # Values read on every tick, resolved once (STUCK_STEPS also fixes dist_hist's maxlen).
+        # Pinned to int/float so the comparisons against float readings stay monomorphic.
+        cfg = self.config
+        self._stuck_steps = int(cfg.STUCK_STEPS)
+        self._stuck_delta = float(cfg.STUCK_DELTA_CM)
+        self._stop_cm = float(cfg.STOP_CM)
+        self._clear_cm = float(cfg.CLEAR_CM)
+        self._forward_spd = float(cfg.FORWARD_SPD)
+        self._turn_spd = float(cfg.TURN_SPD)
+        
         # State management
-        self.dist_hist = deque(maxlen=self.config.STUCK_STEPS)
+        self.dist_hist = deque(maxlen=self._stuck_steps)
         self.stuck_cooldown = 0
-        self.queued_moves = []  # List of (motion, speed, ticks_remaining) tuples
+        self.queued_moves = deque()  # [motion, speed, ticks_remaining] entries, counted down in place
         self.consecutive_no_echo = 0  # Track consecutive invalid readings
+        # Monotonic (value, seq) deques over the last STUCK_STEPS valid readings,
+        # so the spread of dist_hist is available without rescanning it
+        self._seq = 0
+        self._min_dq = deque()
+        self._max_dq = deque()
         
     def update_distance(self, front_distance_cm: float):
         """
@@ -42,22 +64,48 @@ class Policy:
         Args:
             front_distance_cm: Latest front distance reading in cm
         """
-        if front_distance_cm != float('inf'):
+        if front_distance_cm != inf:
             self.dist_hist.append(front_distance_cm)
             self.consecutive_no_echo = 0  # Reset no-echo counter on valid reading
+            self._track_extremes(front_distance_cm)
             
             # Log distance history when we have a full set of readings
-            if len(self.dist_hist) == self.config.STUCK_STEPS:
-                recent = list(self.dist_hist)
-                spread = max(recent) - min(recent)
-                if spread < self.config.STUCK_DELTA_CM * 1.5:
-                    print(f"[DISTANCE] Spread: {spread:.1f}cm (threshold: {self.config.STUCK_DELTA_CM}cm)")
+            if len(self.dist_hist) == self._stuck_steps:
+                if log.isEnabledFor(logging.DEBUG):
+                    spread = self.spread()
+                    if spread < self._stuck_delta * 1.5:
+                        log.debug("[DISTANCE] Spread: %.1fcm (threshold: %scm)", spread, self._stuck_delta)
         else:
             # Track consecutive invalid readings
             self.consecutive_no_echo += 1
-            if self.consecutive_no_echo >= self.config.STUCK_STEPS:
-                print(f"[NO_ECHO] {self.consecutive_no_echo} consecutive invalid readings (threshold: {self.config.STUCK_STEPS})")
+            if self.consecutive_no_echo >= self._stuck_steps and log.isEnabledFor(logging.DEBUG):
+                log.debug("[NO_ECHO] %d consecutive invalid readings (threshold: %s)",
+                          self.consecutive_no_echo, self._stuck_steps)
     
+    def _track_extremes(self, value: float):
+        """Push ``value`` into the rolling min/max deques, expiring readings older than STUCK_STEPS."""
+        self._seq += 1
+        seq = self._seq
+        expired = seq - self._stuck_steps
+        min_dq = self._min_dq
+        max_dq = self._max_dq
+        while min_dq and min_dq[0][1] <= expired:
+            min_dq.popleft()
+        while max_dq and max_dq[0][1] <= expired:
+            max_dq.popleft()
+        while min_dq and min_dq[-1][0] >= value:
+            min_dq.pop()
+        while max_dq and max_dq[-1][0] <= value:
+            max_dq.pop()
+        min_dq.append((value, seq))
+        max_dq.append((value, seq))
+
+    def spread(self) -> float:
+        """Max minus min of the recent valid readings (0.0 before the first one)."""
+        if not self._min_dq:
+            return 0.0
+        return self._max_dq[0][0] - self._min_dq[0][0]
+
     def get_next_action(self, prev_motion: str, front_distance_cm: float) -> Tuple[str, float, str, bool]:
         """
         Decide the next action for the robot.
@@ -80,19 +128,7 @@ class Policy:
         """
         # Process queued recovery moves first
         if self.queued_moves:
-            next_motion, next_speed, ticks_remaining = self.queued_moves[0]
-            
-            # Decrement the tick counter
-            ticks_remaining -= 1
-            
-            # Update or remove the move
-            if ticks_remaining > 0:
-                self.queued_moves[0] = (next_motion, next_speed, ticks_remaining)
-            else:
-                self.queued_moves.pop(0)
-            
-            notes = f"recovery_{next_motion}_{ticks_remaining}"
-            return (next_motion, next_speed, notes, True)
+            return self._take_queued_move()
         
         # Get normal navigation decision
         next_motion, next_speed, notes = self.decide_next_motion(front_distance_cm, prev_motion)
@@ -101,42 +137,41 @@ class Policy:
         is_stuck = False
         stuck_notes = ""
         cooldown = 0
+        stuck_steps = self._stuck_steps
         
         # Check for no-echo stuck (consecutive invalid readings)
-        if self.consecutive_no_echo >= self.config.STUCK_STEPS and self.stuck_cooldown <= 0:
+        if self.consecutive_no_echo >= stuck_steps and self.stuck_cooldown <= 0:
             is_stuck = True
             stuck_notes = f"NO_ECHO_STUCK: {self.consecutive_no_echo} invalid readings -> back {self.config.BACK_TICKS} + turn {self.config.NUDGE_TICKS}"
             cooldown = self.config.STUCK_COOLDOWN_STEPS
         # Check for normal stuck (distance not changing)
-        elif len(self.dist_hist) >= self.config.STUCK_STEPS and self.stuck_cooldown <= 0:
+        elif len(self.dist_hist) >= stuck_steps and self.stuck_cooldown <= 0:
             is_stuck, stuck_notes, cooldown = self.is_robot_stuck(
                 self.dist_hist,
                 next_motion,
-                self.config
+                self.config,
+                self.spread(),
             )
         
         # Trigger recovery if stuck
         if is_stuck:
             # Queue recovery moves
-            turn_dir = random.choice(["left", "right"])
-            self.queued_moves = [
-                ("backward", self.config.BACK_SPD, self.config.BACK_TICKS),
-                (turn_dir, self.config.TURN_SPD, self.config.NUDGE_TICKS),
-            ]
+            turn_dir = _TURNS[getrandbits(1)]
+            self.queued_moves = deque((
+                ["backward", float(self.config.BACK_SPD), int(self.config.BACK_TICKS)],
+                [turn_dir, self._turn_spd, int(self.config.NUDGE_TICKS)],
+            ))
             
-            # Set cooldown and update notes
+            # Set cooldown; the stuck notes are only logged, the action carries the recovery notes
             self.stuck_cooldown = cooldown
-            notes = stuck_notes
             
-            # Reset no-echo counter and clear history
+            # Reset no-echo counter
             self.consecutive_no_echo = 0
-            if len(self.dist_hist) > self.config.STUCK_STEPS:
-                self.dist_hist = deque(list(self.dist_hist)[-self.config.STUCK_STEPS:])
             
-            print(f"\n[RECOVERY] Executing recovery maneuver: {stuck_notes}")
+            log.info("[RECOVERY] Executing recovery maneuver: %s", stuck_notes)
             
             # Return the first recovery move
-            return self.get_next_action(prev_motion, front_distance_cm)
+            return self._take_queued_move()
         
         # Decrement cooldown if needed
         if self.stuck_cooldown > 0:
@@ -145,6 +180,23 @@ class Policy:
         
         return (next_motion, next_speed, notes, False)
     
+    def _take_queued_move(self) -> Tuple[str, float, str, bool]:
+        """Consume one tick of the head recovery move and return it as an action."""
+        queued_moves = self.queued_moves
+        head = queued_moves[0]
+        next_motion, next_speed = head[0], head[1]
+        
+        # Decrement the tick counter in place
+        head[2] -= 1
+        ticks_remaining = head[2]
+        
+        # Remove the move once its ticks are used up
+        if ticks_remaining <= 0:
+            queued_moves.popleft()
+        
+        notes = f"recovery_{next_motion}_{ticks_remaining}"
+        return (next_motion, next_speed, notes, True)
+    
     def is_stuck_triggered(self) -> bool:
         """
         Check if the robot is currently executing recovery moves.
@@ -152,7 +204,19 @@ class Policy:
         Returns:
             True if recovery moves are queued, False otherwise
         """
-        return len(self.queued_moves) > 0
+        return bool(self.queued_moves)
+    
+    def peek_queued_move(self) -> Optional[Tuple[str, float]]:
+        """
+        Get the next queued recovery move without consuming it.
+        
+        Returns:
+            (motion, speed) of the next recovery move, or None if none is queued
+        """
+        if self.queued_moves:
+            head = self.queued_moves[0]
+            return head[0], head[1]
+        return None
     
     def get_queue_length(self) -> int:
         """
@@ -163,7 +227,7 @@ class Policy:
         """
         return len(self.queued_moves)
     
-    def is_robot_stuck(self, distance_history: Collection[float], next_motion: str, config) -> Tuple[bool, str, int]:
+    def is_robot_stuck(self, distance_history: Collection[float], next_motion: str, config, spread: Optional[float] = None) -> Tuple[bool, str, int]:
         """
         Determine if the robot is stuck based on recent distance readings.
         
@@ -171,6 +235,7 @@ class Policy:
             distance_history: Collection of recent distance measurements
             next_motion: Next planned motion command
             config: Configuration object with STUCK_* constants
+            spread: Precomputed max - min of ``distance_history``, if known
             
         Returns:
             Tuple of (is_stuck, notes, cooldown_steps)
@@ -179,14 +244,14 @@ class Policy:
         if not distance_history or len(distance_history) != config.STUCK_STEPS:
             return False, "", 0
         
-        # Get the readings (should be exactly STUCK_STEPS long)
-        readings = list(distance_history)
-        
-        # Calculate the spread of the readings
-        spread = max(readings) - min(readings)
+        # Calculate the spread of the readings unless the caller tracked it
+        if spread is None:
+            spread = max(distance_history) - min(distance_history)
         
         # Log the stuck check details
-        print(f"[STUCK_CHECK] Motion: {next_motion}, Spread: {spread:.1f}cm (threshold: {config.STUCK_DELTA_CM}cm)")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[STUCK_CHECK] Motion: %s, Spread: %.1fcm (threshold: %scm)",
+                      next_motion, spread, config.STUCK_DELTA_CM)
         
         # If the spread is too small, we're not moving much
         if spread < config.STUCK_DELTA_CM:
@@ -199,17 +264,17 @@ class Policy:
         """
         Autonomous policy: returns (next_motion, speed, notes)
         """
-        if distance_cm == float('inf'):
-            return ("stop", 0.0, "no-echo: waiting for valid reading")
+        if distance_cm == inf:
+            return ("stop", 0.0, _NOTE_NO_ECHO)
 
-        if distance_cm <= self.config.STOP_CM:
-            direction = random.choice(["left", "right"])
-            return (direction, self.config.TURN_SPD, f"obstacle@{distance_cm:.1f}cm")
+        if distance_cm <= self._stop_cm:
+            direction = _TURNS[getrandbits(1)]
+            return (direction, self._turn_spd, f"obstacle@{distance_cm:.1f}cm")
 
-        if distance_cm >= self.config.CLEAR_CM:
-            return ("forward", self.config.FORWARD_SPD, "clear")
+        if distance_cm >= self._clear_cm:
+            return ("forward", self._forward_spd, _NOTE_CLEAR)
 
-        if prev_motion in ("left", "right"):
-            return (prev_motion, self.config.TURN_SPD * 0.8, f"bias-{prev_motion}@{distance_cm:.1f}cm")
+        if prev_motion in _TURNS:
+            return (prev_motion, self._turn_spd * 0.8, f"bias-{prev_motion}@{distance_cm:.1f}cm")
 
-        return ("forward", self.config.FORWARD_SPD * 0.8, f"caution@{distance_cm:.1f}cm")
\ No newline at end of file
+        return ("forward", self._forward_spd * 0.8, f"caution@{distance_cm:.1f}cm")
\ No newline at end of file
@@ -3,7 +3,8 @@ try:
 except Exception:
     import config  # type: ignore
 
-import random
+from random import getrandbits
+from math import inf
 from typing import Dict, Tuple
 
 
@@ -19,9 +20,9 @@ def decide_next_motion(distances: Dict[str, float], prev_motion: str) -> Tuple[s
         Tuple of (next_motion, speed, reason)
     """
     # Get distances with fallback to infinity if sensor not found
-    front_dist = distances.get('front', float('inf'))
-    left_dist = distances.get('left', float('inf'))
-    right_dist = distances.get('right', float('inf'))
+    front_dist = distances.get('front', inf)
+    left_dist = distances.get('left', inf)
+    right_dist = distances.get('right', inf)
     
     # Check for immediate obstacles
     if front_dist <= config.STOP_CM:
@@ -56,7 +57,7 @@ def decide_next_motion(distances: Dict[str, float], prev_motion: str) -> Tuple[s
         return ("forward", config.FORWARD_SPD * 0.7, f"approaching obstacle@{front_dist:.1f}cm")
     
     # Default to a gentle turn if we're not sure what to do
-    direction = random.choice(["left", "right"])
+    direction = ("left", "right")[getrandbits(1)]
     return (direction, config.TURN_SPD * 0.6, f"exploring {direction}")
 
 
@@ -1,5 +1,6 @@
-import time
-import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from math import inf
 from typing import Dict, List, Optional, Tuple
 
 import pigpio
@@ -7,6 +8,21 @@ import pigpio
 SOUND_SPEED = 343.0  # m/s @ ~20C
 
 
+def _median(readings: List[float]) -> float:
+    """Median of a non-empty list; three readings (the default) take two comparisons."""
+    n = len(readings)
+    if n == 3:
+        a, b, c = readings
+        if a > b:
+            a, b = b, a
+        return a if c < a else (b if c > b else c)
+    if n == 1:
+        return readings[0]
+    s = sorted(readings)
+    mid = n // 2
+    return s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2
+
+
 class UltrasonicSensor:
     def __init__(self, pi: pigpio.pi, trig: int, echo: int, name: str, max_distance_m: float = 2.5, samples: int = 3):
         """Initialize a single ultrasonic sensor.
@@ -36,13 +52,15 @@ class UltrasonicSensor:
         # Edge detection
         self._rise = None
         self._fall = None
+        self._done = threading.Event()  # set by the callback once an echo pulse has ended
         self._cb = self.pi.callback(self.echo, pigpio.EITHER_EDGE, self._edge)
 
     def _edge(self, gpio: int, level: int, tick: int) -> None:
         if level == 1:
             self._rise = tick
-        elif level == 0:
+        elif level == 0 and self._rise is not None:
             self._fall = tick
+            self._done.set()
 
     @staticmethod
     def _ticks_to_s(start: int, end: int) -> float:
@@ -54,6 +72,7 @@ class UltrasonicSensor:
         """Send a 10µs pulse to the trigger pin."""
         self._rise = None
         self._fall = None
+        self._done.clear()
         self.pi.gpio_trigger(self.trig, 10, 1)  # 10 µs HIGH
 
     def distance_cm(self) -> float:
@@ -61,19 +80,17 @@ class UltrasonicSensor:
         readings = []
         for _ in range(self.samples):
             self._pulse()
-            start = time.time()
-            while (time.time() - start) < self.timeout_s:
-                if self._rise is not None and self._fall is not None and self._fall > self._rise:
-                    duration = self._ticks_to_s(self._rise, self._fall)
-                    distance = (duration * SOUND_SPEED * 100) / 2  # cm
-                    if distance < (self.max_distance_m * 100):
-                        readings.append(distance)
-                    break
-                time.sleep(0.001)  # 1ms delay between checks
+            # Block until the echo callback reports the falling edge instead of polling
+            if not self._done.wait(self.timeout_s):
+                continue
+            duration = self._ticks_to_s(self._rise, self._fall)
+            distance = (duration * SOUND_SPEED * 100) / 2  # cm
+            if distance < (self.max_distance_m * 100):
+                readings.append(distance)
 
         if not readings:
-            return float('inf')
-        return statistics.median(readings)
+            return inf
+        return _median(readings)
 
     def cleanup(self) -> None:
         """Clean up GPIO resources."""
@@ -83,13 +100,15 @@ class UltrasonicSensor:
 
 
 class MultiUltrasonic:
-    def __init__(self, config: dict, max_distance_m: float = 2.5, samples: int = 3):
+    def __init__(self, config: dict, max_distance_m: float = 2.5, samples: int = 3, parallel: bool = False):
         """Initialize multiple ultrasonic sensors.
         
         Args:
             config: Dictionary with sensor names as keys and (trig, echo) tuples as values
             max_distance_m: Maximum distance to measure in meters
             samples: Number of samples to take for each reading
+            parallel: Ping all sensors at the same time instead of one after another.
+                Only safe when no sensor can pick up another one's echo.
         """
         self.pi = pigpio.pi()  # needs pigpiod running
         if not self.pi.connected:
@@ -105,11 +124,32 @@ class MultiUltrasonic:
                 max_distance_m=max_distance_m,
                 samples=samples
             )
+        # Fixed (front, left, right) order for get_distances_tuple; missing positions read as inf
+        self._ordered = tuple(self.sensors.get(name) for name in ("front", "left", "right"))
+        # One worker per sensor; the reads are spent waiting on echoes, not CPU
+        self._pool = None
+        if parallel and len(self.sensors) > 1:
+            self._pool = ThreadPoolExecutor(max_workers=len(self.sensors), thread_name_prefix="sonar")
     
     def get_distances(self) -> Dict[str, float]:
         """Get distances from all sensors."""
+        if self._pool is not None:
+            futures = {name: self._pool.submit(sensor.distance_cm) for name, sensor in self.sensors.items()}
+            return {name: f.result() for name, f in futures.items()}
         return {name: sensor.distance_cm() for name, sensor in self.sensors.items()}
     
+    def get_distances_tuple(self) -> Tuple[float, float, float]:
+        """Get (front, left, right) distances in cm without building a dict."""
+        if self._pool is not None:
+            futures = [None if s is None else self._pool.submit(s.distance_cm) for s in self._ordered]
+            return tuple(inf if f is None else f.result() for f in futures)
+        front, left, right = self._ordered
+        return (
+            front.distance_cm() if front is not None else inf,
+            left.distance_cm() if left is not None else inf,
+            right.distance_cm() if right is not None else inf,
+        )
+    
     def get_distance(self, name: str) -> float:
         """Get distance from a specific sensor by name."""
         if name not in self.sensors:
@@ -117,14 +157,15 @@ class MultiUltrasonic:
         return self.sensors[name].distance_cm()
     
     def cleanup(self) -> None:
-        """Clean up all sensors and GPIO resources."""
+        """Clean up all sensors and GPIO resources. Safe to call more than once."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
         for sensor in self.sensors.values():
             sensor.cleanup()
-        self.pi.stop()
-
-    def close(self):
-        if self._cb:
-            self._cb.cancel()
-        if self.pi and self.pi.connected:
+        if self.pi.connected:
             self.pi.stop()
 
+    def close(self) -> None:
+        """Alias of cleanup(); the controller closes its sensor when its loop exits."""
+        self.cleanup()
@@ -1,8 +1,10 @@
 import os
 import csv
-import queue
+import time
 from datetime import datetime
 import atexit
+import logging
+from math import inf
 
 from gpiozero import CamJamKitRobot
 
@@ -12,6 +14,7 @@ try:
     from firmware.web.server import start_dashboard_server
     from firmware.control.keyboard import CbreakKeyboard
     from firmware.control.controller import Controller
+    from firmware.control.command_queue import CommandQueue
     from firmware.config_manager import ConfigManager
     from firmware.policy_manager import PolicyManager
     from firmware.control.policy import Policy as DefaultPolicy
@@ -21,12 +24,24 @@ except Exception:
     from web.server import start_dashboard_server  # type: ignore
     from control.keyboard import CbreakKeyboard  # type: ignore
     from control.controller import Controller  # type: ignore
+    from control.command_queue import CommandQueue  # type: ignore
     from config_manager import ConfigManager  # type: ignore
     from policy_manager import PolicyManager  # type: ignore
     from control.policy import Policy as DefaultPolicy  # type: ignore
 
 
+def _fmt_num(value) -> str:
+    """Format a numeric run-log cell to 2 decimals; missing and no-echo (inf) values are blank."""
+    if value is None or value == '' or value == inf:
+        return ""
+    try:
+        return f"{float(value):.2f}"
+    except (ValueError, TypeError):
+        return ""
+
+
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     server = None
     hub = None
@@ -73,14 +88,16 @@ def main():
     sensors = MultiUltrasonic(
         config=sensor_config,
         max_distance_m=config.MAX_DISTANCE_M,
-        samples=config.SAMPLES_PER_READ
+        samples=config.SAMPLES_PER_READ,
+        parallel=config.PARALLEL_SONAR
     )
     
     # Create logs directory if it doesn't exist
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
     log_file = os.path.join(log_dir, f"runlog_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
-    f = open(log_file, "w", newline="")
+    # Large buffer so a batch of rows always goes out in a single write
+    f = open(log_file, "w", newline="", buffering=1 << 16)
     writer = csv.writer(f)
     writer.writerow([
         "timestamp_iso", "mode", "front_distance_cm", "left_distance_cm", "right_distance_cm",
@@ -89,43 +106,64 @@ def main():
         "notes", "stuck_triggered", "queue_len"
     ])
     f.flush()
+    # Rows are flushed in batches and on mode changes/stops/stuck triggers; cleanup() at exit writes out and syncs the remainder
+    pending_rows = 0
+    last_flush = time.monotonic()
+    last_stuck = False
+    # Timestamps have one-second resolution, so format each second only once
+    ts_sec = None
+    ts_text = ""
 
     def write_row(row):
         # row: [mode, front_d, left_d, right_d, exec_motion, exec_speed, next_motion, next_speed, notes, stuck, qlen]
-        def format_value(value, is_numeric=False):
-            if value in (None, '') or (is_numeric and value == float('inf')):
-                return ""
-            if is_numeric:
-                try:
-                    return f"{float(value):.2f}"
-                except (ValueError, TypeError):
-                    return ""
-            return str(value)
-            
+        nonlocal pending_rows, last_flush, last_stuck, ts_sec, ts_text
+        sec = int(time.time())
+        if sec != ts_sec:
+            ts_sec = sec
+            ts_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec))
         writer.writerow([
-            datetime.now().isoformat(timespec="seconds"),
+            ts_text,
             row[0],  # mode
-            format_value(row[1], is_numeric=True),  # front_distance_cm
-            format_value(row[2], is_numeric=True),  # left_distance_cm
-            format_value(row[3], is_numeric=True),  # right_distance_cm
+            _fmt_num(row[1]),  # front_distance_cm
+            _fmt_num(row[2]),  # left_distance_cm
+            _fmt_num(row[3]),  # right_distance_cm
             row[4],  # executed_motion
-            format_value(row[5], is_numeric=True),  # executed_speed
+            _fmt_num(row[5]),  # executed_speed
             row[6],  # next_motion
-            format_value(row[7], is_numeric=True),  # next_speed
+            _fmt_num(row[7]),  # next_speed
             row[8],  # notes
             1 if row[9] else 0,  # stuck_triggered (convert boolean to 0/1)
             row[10]  # queue_len
         ])
-        f.flush()
+        pending_rows += 1
+        now = time.monotonic()
+        # The row where stuck recovery starts is flushed right away, so it and the rows
+        # leading up to it survive a crash
+        stuck_started = row[9] and not last_stuck
+        last_stuck = row[9]
+        if stuck_started or pending_rows >= config.LOG_FLUSH_ROWS or now - last_flush >= config.LOG_FLUSH_S:
+            f.flush()
+            pending_rows = 0
+            last_flush = now
+
+    def flush_log():
+        # Write out the pending batch now; the controller calls this on mode changes and stops
+        nonlocal pending_rows, last_flush
+        if pending_rows:
+            f.flush()
+            pending_rows = 0
+            last_flush = time.monotonic()
+
+    write_row.flush = flush_log
+
+    # Create a queue for commands
+    commands_q = CommandQueue(maxsize=config.COMMANDS_Q_MAXSIZE)
 
     kb = CbreakKeyboard()
     kb.start()
     atexit.register(kb.stop)
     print("Controls: Enter=toggle MANUAL, WASD=drive. Ctrl+C to quit.")
     print(f"Logging to {log_file}.")
-
-    # Create a queue for commands
-    commands_q = queue.Queue()
     
     # Create controller first
     controller = Controller(robot, sensors, write_row, None, commands_q, keyboard=kb, 
@@ -158,6 +196,12 @@ def main():
                 server.shutdown()
         except Exception:
             pass
+        try:
+            # Push the last partial batch of rows to disk, not just to the page cache
+            f.flush()
+            os.fsync(f.fileno())
+        except Exception:
+            pass
         f.close()
         sensors.cleanup()
     
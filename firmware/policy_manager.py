@@ -1,9 +1,12 @@
 from __future__ import annotations
 import importlib.util
+import logging
 import os
 import types
 from typing import Callable, Tuple, Optional
 
+log = logging.getLogger(__name__)
+
 
 class PolicyManager:
     """
@@ -27,14 +30,31 @@ class PolicyManager:
         self._config = config_obj
         self._active_policy = None
         self._active_name = "default"
+        # Bound methods of the active policy (None where it lacks one), refreshed by _activate()
+        self._m_update_distance = None
+        self._m_get_next_action = None
+        self._m_is_stuck_triggered = None
+        self._m_peek_queued_move = None
+        self._m_get_queue_length = None
         self._last_error: Optional[str] = None
+        self._has_custom = False  # whether custom code was on disk at the last reload()
         self.reload()
 
+    def _activate(self, policy, name: str) -> None:
+        """Install ``policy`` as the active policy and cache its optional methods."""
+        self._active_policy = policy
+        self._active_name = name
+        self._m_update_distance = getattr(policy, 'update_distance', None)
+        self._m_get_next_action = getattr(policy, 'get_next_action', None)
+        self._m_is_stuck_triggered = getattr(policy, 'is_stuck_triggered', None)
+        self._m_peek_queued_move = getattr(policy, 'peek_queued_move', None)
+        self._m_get_queue_length = getattr(policy, 'get_queue_length', None)
+
     def status(self) -> dict:
         """Get the current status of the policy manager."""
         return {
             "name": self._active_name,
-            "has_custom": os.path.exists(self._storage_path),
+            "has_custom": self._has_custom,
             "error": self._last_error,
         }
 
@@ -45,8 +65,9 @@ class PolicyManager:
         Args:
             front_distance_cm: Latest front distance reading in cm
         """
-        if self._active_policy and hasattr(self._active_policy, 'update_distance'):
-            self._active_policy.update_distance(front_distance_cm)
+        update_distance = self._m_update_distance
+        if update_distance is not None:
+            update_distance(front_distance_cm)
     
     def get_next_action(self, prev_motion: str, front_distance_cm: float) -> Tuple[str, float, str, bool]:
         """
@@ -60,18 +81,18 @@ class PolicyManager:
             Tuple of (motion, speed, notes, is_recovery)
         """
         try:
-            if self._active_policy and hasattr(self._active_policy, 'get_next_action'):
-                return self._active_policy.get_next_action(prev_motion, front_distance_cm)
+            get_next_action = self._m_get_next_action
+            if get_next_action is not None:
+                return get_next_action(prev_motion, front_distance_cm)
             else:
                 # Fallback for policies without get_next_action
                 motion, speed, notes = self._active_policy.decide_next_motion(front_distance_cm, prev_motion)
                 return (motion, speed, notes, False)
         except Exception as e:
             self._last_error = f"active_policy_error: {e!r}"
-            print(f"[ERROR] Policy error: {e}")
+            log.error("[ERROR] Policy error: %s", e)
             # Reload default policy
-            self._active_policy = self._default_policy_class(self._config)
-            self._active_name = "default"
+            self._activate(self._default_policy_class(self._config), "default")
             return ("stop", 0.0, f"policy_error: {e}", False)
     
     def is_stuck_triggered(self) -> bool:
@@ -81,10 +102,23 @@ class PolicyManager:
         Returns:
             True if recovery moves are queued, False otherwise
         """
-        if self._active_policy and hasattr(self._active_policy, 'is_stuck_triggered'):
-            return self._active_policy.is_stuck_triggered()
+        is_stuck_triggered = self._m_is_stuck_triggered
+        if is_stuck_triggered is not None:
+            return is_stuck_triggered()
         return False
     
+    def peek_queued_move(self) -> Optional[Tuple[str, float]]:
+        """
+        Get the next queued recovery move without consuming it.
+        
+        Returns:
+            (motion, speed) of the next recovery move, or None
+        """
+        peek_queued_move = self._m_peek_queued_move
+        if peek_queued_move is not None:
+            return peek_queued_move()
+        return None
+
     def get_queue_length(self) -> int:
         """
         Get the number of queued recovery moves.
@@ -92,8 +126,9 @@ class PolicyManager:
         Returns:
             Number of queued moves
         """
-        if self._active_policy and hasattr(self._active_policy, 'get_queue_length'):
-            return self._active_policy.get_queue_length()
+        get_queue_length = self._m_get_queue_length
+        if get_queue_length is not None:
+            return get_queue_length()
         return 0
 
     def set_code(self, code_text: str) -> None:
@@ -115,11 +150,12 @@ class PolicyManager:
     def reload(self) -> None:
         """Reload the active policy from storage or use default."""
         self._last_error = None
+        # set_code() and delete_custom() both end in reload(), so this stays current
+        self._has_custom = os.path.exists(self._storage_path)
         
         # Use default policy if no custom policy exists
-        if not os.path.exists(self._storage_path):
-            self._active_policy = self._default_policy_class(self._config)
-            self._active_name = "default"
+        if not self._has_custom:
+            self._activate(self._default_policy_class(self._config), "default")
             return
             
         try:
@@ -134,8 +170,7 @@ class PolicyManager:
             policy_class = getattr(mod, "Policy", None)
             if policy_class is not None:
                 # Use the custom Policy class
-                self._active_policy = policy_class(self._config)
-                self._active_name = "custom"
+                self._activate(policy_class(self._config), "custom")
             else:
                 # Fallback: try to get decide_next_motion function for compatibility
                 fn = getattr(mod, "decide_next_motion", None)
@@ -164,11 +199,9 @@ class PolicyManager:
                     def get_queue_length(self) -> int:
                         return 0
                 
-                self._active_policy = LegacyPolicyWrapper(self._config)
-                self._active_name = "custom_legacy"
+                self._activate(LegacyPolicyWrapper(self._config), "custom_legacy")
             
         except Exception as e:
             self._last_error = f"load_error: {e!r}"
-            print(f"[ERROR] Failed to load custom policy: {e}")
-            self._active_policy = self._default_policy_class(self._config)
-            self._active_name = "default"
+            log.error("[ERROR] Failed to load custom policy: %s", e)
+            self._activate(self._default_policy_class(self._config), "default")
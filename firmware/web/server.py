@@ -4,18 +4,19 @@ import json
 import os
 import queue
 import threading
-import time
 import urllib.parse
-import datetime
-print(f"DEBUG - datetime module available: {hasattr(datetime, 'datetime')}")
 from pathlib import Path
 from functools import partial
 from typing import Optional, Dict, Any, List, Union
 
 try:
+    from firmware import config
     from firmware.web.sse import DashboardHub, _SSEClient
+    from firmware.control.command_queue import CommandQueue
 except Exception:
+    import config  # type: ignore
     from web.sse import DashboardHub, _SSEClient  # type: ignore
+    from control.command_queue import CommandQueue  # type: ignore
 
 
 def _get_local_ip() -> str:
@@ -35,7 +36,7 @@ def _get_local_ip() -> str:
 
 class DashboardHandler(http.server.SimpleHTTPRequestHandler):
     hub: DashboardHub = None
-    commands: "queue.Queue[object]" = None
+    commands: "CommandQueue" = None
     config_manager = None
     policy_manager = None
     controller = None  # Add controller class variable
@@ -55,6 +56,13 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
         self._set_cors()
         self.end_headers()
 
+    def _send_queue_full(self):
+        self.send_response(503)
+        self._set_cors()
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"success": False, "error": "queue full"}).encode("utf-8"))
+
     def _read_json(self):
         try:
             length = int(self.headers.get("Content-Length", "0"))
@@ -73,91 +81,6 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             import traceback
             traceback.print_exc()
             return None
-            
-    def _handle_command_sequence(self, controller, commands):
-        """Process a sequence of movement commands and return the execution log.
-        
-        Args:
-            commands: List of command objects with 'name', 'speed', and 'duration_s' or 'duration_ms'
-            
-        Returns:
-            dict: Response with success status and execution log
-        """
-        print("\n--- Executing Command Sequence ---")
-        print(f"Controller type: {type(controller).__name__}")
-        print(f"Commands: {commands}")
-        try:
-            result = self._handle_command_sequence_impl(commands)
-            print(f"Command execution result: {result}")
-            return result
-        except Exception as e:
-            print(f"ERROR in _handle_command_sequence: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise
-
-    def _handle_command_sequence_impl(self, commands):
-        if not commands or not isinstance(commands, list):
-            return {"success": False, "error": "No commands provided"}
-            
-        log = []
-        
-        for cmd in commands:
-            if not isinstance(cmd, dict) or 'name' not in cmd:
-                return {"success": False, "error": f"Invalid command: {cmd}"}
-                
-            # Prepare the command for the queue
-            cmd_data = {
-                "type": "cmd",
-                "name": cmd["name"],
-                "speed": cmd.get("speed"),
-                "duration_ms": cmd.get("duration_ms"),
-                "duration_s": cmd.get("duration_s")
-            }
-            
-            try:
-                # Put the command in the queue
-                self.commands.put_nowait(cmd_data)
-                
-                # Get the current state for logging (this is a simplified version)
-                state = self.hub.get_state() if hasattr(self.hub, "get_state") else {}
-                
-                # Add to log
-                log_entry = {
-                    "timestamp_iso": datetime.datetime.now().isoformat(),  # Using the datetime module
-                    "mode": state.get("mode", "REMOTE"),
-                    "front_distance_cm": state.get("front_distance_cm"),
-                    "left_distance_cm": state.get("left_distance_cm"),
-                    "right_distance_cm": state.get("right_distance_cm"),
-                    "executed_motion": cmd["name"],
-                    "executed_speed": cmd.get("speed", 0.0),
-                    "next_motion": "",  # Not available in this simple implementation
-                    "next_speed": 0.0,  # Not available in this simple implementation
-                    "notes": f"Executed {cmd['name']}",
-                    "stuck_triggered": 0,
-                    "queue_len": self.commands.qsize()
-                }
-                log.append(log_entry)
-                
-                # Small delay to allow the command to be processed
-                time.sleep(0.1)
-                
-            except Exception as e:
-                print(f"ERROR in command execution: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                return {
-                    "success": False, 
-                    "error": f"Error executing command {cmd}: {str(e)}",
-                    "debug": {
-                        "error_type": str(type(e).__name__),
-                        "error_message": str(e),
-                        "available_modules": list(sys.modules.keys())
-                    },
-                    "log": log
-                }
-        
-        return {"success": True, "log": log}
 
     def do_GET(self):
         parsed = urllib.parse.urlparse(self.path)
@@ -175,9 +98,8 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 self.wfile.flush()
                 while client.alive:
                     try:
-                        msg = client.queue.get(timeout=15)
-                        payload = ("data: " + msg + "\n\n").encode("utf-8")
-                        self.wfile.write(payload)
+                        frame = client.queue.get(timeout=15)
+                        self.wfile.write(frame)
                         self.wfile.flush()
                     except queue.Empty:
                         try:
@@ -330,6 +252,8 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                     "duration_ms":obj.get("duration_ms"),
                     "duration_s":obj.get("duration_s"),
                 })
+            except queue.Full:
+                self._send_queue_full(); return
             except Exception:
                 pass
             self.send_response(204); self._set_cors(); self.end_headers(); return
@@ -341,6 +265,8 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_response(400); self._set_cors(); self.end_headers(); return
             try:
                 self.commands.put_nowait({"type":"mode","mode":mode})
+            except queue.Full:
+                self._send_queue_full(); return
             except Exception:
                 pass
             self.send_response(200); self._set_cors(); self.send_header("Content-Type","application/json"); self.end_headers()
@@ -408,7 +334,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 def start_dashboard_server(root_dir: str, port: int = 8000, config_manager=None, policy_manager=None, controller=None):
     hub = DashboardHub()
     # Use the controller's existing command queue instead of creating a new one
-    commands_q = controller.commands_q if controller and hasattr(controller, 'commands_q') else queue.Queue()
+    commands_q = controller.commands_q if controller and hasattr(controller, 'commands_q') else CommandQueue(maxsize=config.COMMANDS_Q_MAXSIZE)
     handler_cls = partial(DashboardHandler, directory=root_dir)
     try:
         httpd = http.server.ThreadingHTTPServer(("0.0.0.0", port), handler_cls)
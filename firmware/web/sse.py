@@ -1,24 +1,72 @@
 import threading
 import queue
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
+
+try:
+    import orjson  # optional, C-accelerated encoder
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def encode_json(obj: Any) -> bytes:
+        """Serialize ``obj`` to compact JSON bytes."""
+        return orjson.dumps(obj)
+else:
+    # One shared compact encoder instead of a fresh one per json.dumps call
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def encode_json(obj: Any) -> bytes:
+        """Serialize ``obj`` to compact JSON bytes."""
+        return _encoder.encode(obj).encode("utf-8")
+
+
+# Frames buffered per SSE client. A client that falls further behind loses its
+# oldest frames: the dashboard only needs the latest state, and the control
+# loop must never wait on a slow connection.
+CLIENT_BACKLOG = 32
 
 
 class _SSEClient:
     def __init__(self):
-        self.queue: "queue.Queue[str]" = queue.Queue()
+        # Holds ready-to-write SSE frames ("data: ...\n\n" as bytes)
+        self.queue: "queue.Queue[bytes]" = queue.Queue(maxsize=CLIENT_BACKLOG)
         self.alive = True
 
+    def offer(self, frame: bytes):
+        """Queue ``frame`` without blocking, dropping the oldest frame if the backlog is full."""
+        while True:
+            try:
+                self.queue.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
 
 class DashboardHub:
     def __init__(self):
         self._clients: list[_SSEClient] = []
         self._lock = threading.Lock()
         self._last_state: Optional[Dict[str, Any]] = None
+        self._last_frame: Optional[bytes] = None  # SSE frame of the last published state
 
     def add_client(self, client: _SSEClient):
         with self._lock:
             self._clients.append(client)
+            frame = self._last_frame
+            state = self._last_state
+        # Start the new client from the current state rather than waiting for a change
+        if frame is None and state is not None:
+            frame = b"data: " + encode_json(state) + b"\n\n"
+        if frame is not None:
+            client.offer(frame)
+
+    def has_clients(self) -> bool:
+        return bool(self._clients)
 
     def remove_client(self, client: _SSEClient):
         with self._lock:
@@ -27,19 +75,41 @@ class DashboardHub:
             except ValueError:
                 pass
 
-    def broadcast(self, data: str):
+    def broadcast(self, data: Union[str, bytes]):
+        # Build the SSE frame once and share the same bytes with every client
+        self._send(b"data: " + (data.encode("utf-8") if isinstance(data, str) else data) + b"\n\n")
+
+    def _send(self, frame: bytes):
         with self._lock:
             clients = list(self._clients)
         for c in clients:
             try:
-                c.queue.put_nowait(data)
+                c.offer(frame)
             except Exception:
                 c.alive = False
 
+    def publish(self, state: Dict[str, Any], payload: Optional[bytes] = None):
+        """Store ``state`` as the current state and broadcast it to all clients.
+
+        ``payload`` is the already-serialized JSON for ``state``; it is encoded
+        here when omitted. A shallow copy is stored so callers may keep
+        mutating their dict after publishing it. With no clients connected
+        nothing is serialized; the next client to connect encodes the stored
+        state instead.
+        """
+        self._last_state = dict(state)
+        if payload is None:
+            if not self._clients:
+                self._last_frame = None
+                return
+            payload = encode_json(state)
+        frame = b"data: " + payload + b"\n\n"
+        self._last_frame = frame
+        self._send(frame)
+
     def set_state(self, state: Dict[str, Any]):
-        self._last_state = state
         try:
-            self.broadcast(json.dumps(state))
+            self.publish(state)
         except Exception:
             pass
 
@@ -7,4 +7,7 @@ setup(
     install_requires=[
         'pigpio',
     ],
+    extras_require={
+        'fast': ['orjson'],
+    },
 )
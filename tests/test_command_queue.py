@@ -0,0 +1,104 @@
+"""Tests for CommandQueue and the controller's merging of queued moves."""
+import os
+import queue
+import sys
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path to import from firmware
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firmware.control.command_queue import CommandQueue
+from firmware.control.controller import Controller, MAX_MERGED_MOVES
+
+
+class _NullDevice:
+    """Stands in for the robot and sensor; every method call does nothing."""
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+def _move(name="forward"):
+    return {"type": "cmd", "name": name, "speed": None, "duration_ms": None, "duration_s": None}
+
+
+def test_put_nowait_raises_full_at_maxsize():
+    q = CommandQueue(maxsize=2)
+    q.put_nowait(_move())
+    q.put_nowait(_move("left"))
+    with pytest.raises(queue.Full):
+        q.put_nowait(_move("right"))
+    assert q.qsize() == 2
+
+
+def test_get_nowait_raises_empty():
+    with pytest.raises(queue.Empty):
+        CommandQueue().get_nowait()
+
+
+def test_get_times_out_when_nothing_arrives():
+    q = CommandQueue()
+    t0 = time.monotonic()
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0.05)
+    assert time.monotonic() - t0 >= 0.05
+
+
+def test_get_wakes_on_append():
+    q = CommandQueue()
+    item = _move()
+    timer = threading.Timer(0.05, q.append, (item,))
+    timer.start()
+    t0 = time.monotonic()
+    try:
+        assert q.get(timeout=5.0) is item
+    finally:
+        timer.cancel()
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_legacy_strings_are_wrapped():
+    q = CommandQueue()
+    q.put_nowait("toggle")
+    assert q.get_nowait() == {"type": "legacy", "name": "toggle"}
+
+
+def test_identical_moves_are_all_kept():
+    q = CommandQueue()
+    for _ in range(3):
+        q.put_nowait(_move())
+    assert len(q) == 3
+
+
+def test_controller_rejects_other_queues():
+    with pytest.raises(TypeError):
+        Controller(_NullDevice(), _NullDevice(), None, None, queue.Queue(maxsize=4))
+    with pytest.raises(ValueError):
+        Controller(_NullDevice(), _NullDevice(), None, None, CommandQueue(maxsize=0))
+
+
+def test_controller_merges_identical_moves_up_to_the_cap():
+    q = CommandQueue()
+    c = Controller(_NullDevice(), _NullDevice(), None, None, q)
+    for _ in range(MAX_MERGED_MOVES + 1):
+        q.put_nowait(_move())
+    q.put_nowait(_move("left"))
+    q.put_nowait(_move())
+
+    first = c._next_command()
+    assert first["name"] == "forward" and first["steps"] == MAX_MERGED_MOVES
+    rest = [c._next_command() for _ in range(3)]
+    assert [m["name"] for m in rest] == ["forward", "left", "forward"]
+    assert all("steps" not in m for m in rest)
+    assert c._next_command() is None
+
+
+def test_controller_never_merges_moves_with_a_future():
+    q = CommandQueue()
+    c = Controller(_NullDevice(), _NullDevice(), None, None, q)
+    q.put_nowait(dict(_move(), done=None))
+    q.put_nowait(dict(_move(), done=None))
+    assert "steps" not in c._next_command()
+    assert "steps" not in c._next_command()
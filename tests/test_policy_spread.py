@@ -0,0 +1,24 @@
+"""Randomized check of Policy.spread() against max - min of the recent readings."""
+import os
+import random
+import sys
+from math import inf
+
+# Add parent directory to path to import from firmware
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firmware import config
+from firmware.control.policy import Policy
+
+
+def test_spread_matches_max_minus_min():
+    rng = random.Random(1234)
+    policy = Policy(config)
+    assert policy.spread() == 0.0
+    for _ in range(5000):
+        # Repeated values and no-echo readings exercise ties and skipped ticks
+        reading = rng.choice((inf, rng.uniform(0.0, 300.0), float(rng.randint(0, 5))))
+        policy.update_distance(reading)
+        hist = policy.dist_hist
+        expected = max(hist) - min(hist) if hist else 0.0
+        assert policy.spread() == expected
@@ -0,0 +1,23 @@
+"""Randomized check of the ultrasonic readings' median against statistics.median."""
+import os
+import random
+import statistics
+import sys
+
+import pytest
+
+# Add parent directory to path to import from firmware
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pigpio")  # firmware.hardware.ultrasonic imports it at module level
+
+from firmware.hardware.ultrasonic import _median
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 5, 8])
+def test_median_matches_statistics_median(n):
+    rng = random.Random(n)
+    for _ in range(2000):
+        # Small integer values make ties common
+        readings = [rng.choice((rng.uniform(2.0, 300.0), float(rng.randint(0, 3)))) for _ in range(n)]
+        assert _median(list(readings)) == statistics.median(readings)